@@ -5,6 +5,10 @@ import os
 from typing import Optional, Any, Dict
 from helpers.socket import WebSocketManager
 
+# Max log_sync records waiting to be streamed; beyond this, debug records are
+# only logged locally (warning/error/info are always queued)
+MAX_PENDING_SENDS = 1024
+
 
 class StreamingLogger:
     """
@@ -29,6 +33,10 @@ class StreamingLogger:
         self.service_name = service_name
         self.ws_manager = ws_manager
         self.process_id = process_id or os.getpid()
+        # log_sync streams through one sender task so in-flight sends stay bounded and ordered
+        self._send_queue: Optional[asyncio.Queue] = None
+        self._sender_task: Optional[asyncio.Task] = None
+        self._send_dropped = 0
         
         # Initialize local logger
         logger_name = logger_name or f"{service_name}-{self.process_id}"
@@ -117,7 +125,8 @@ class StreamingLogger:
                 
                 if loop:
                     # Create a task in the existing loop
-                    asyncio.create_task(self._stream_to_websocket(level, message, job_id, **kwargs))
+                    # Hand off to the background sender in the existing loop
+                    self._enqueue_send(level, message, job_id, kwargs)
                 else:
                     # Create new event loop for this call
                     asyncio.run(self._stream_to_websocket(level, message, job_id, **kwargs))
@@ -125,6 +134,33 @@ class StreamingLogger:
                 # If WebSocket streaming fails, continue with local logging only
                 self.logger.debug(f"WebSocket streaming failed, continuing with local logging: {e}")
     
+    def _enqueue_send(self, level: str, message: str, job_id: str, kwargs: Dict[str, Any]):
+        """Queue a record for the sender task; drop debug records once the backlog is full."""
+        if self._send_queue is None:
+            self._send_queue = asyncio.Queue()
+            self._sender_task = asyncio.create_task(self._send_loop())
+        if level.lower() == "debug" and self._send_queue.qsize() >= MAX_PENDING_SENDS:
+            self._send_dropped += 1
+            return
+        self._send_queue.put_nowait((level, message, job_id, kwargs))
+    
+    async def _send_loop(self):
+        """Stream queued log_sync records one at a time (each send awaits the socket)."""
+        while True:
+            level, message, job_id, kwargs = await self._send_queue.get()
+            try:
+                if self._send_dropped:
+                    dropped, self._send_dropped = self._send_dropped, 0
+                    await self._stream_to_websocket(
+                        "warning",
+                        f"{dropped} debug log records not streamed (send backlog full); see local logs",
+                        job_id,
+                        dropped=dropped,
+                    )
+                await self._stream_to_websocket(level, message, job_id, **kwargs)
+            finally:
+                self._send_queue.task_done()
+    
     # Convenience methods for different log levels
     async def info_async(self, message: str, job_id: str, **kwargs):
         """Log info message asynchronously"""
@@ -164,6 +200,15 @@ class StreamingLogger:
     
     async def close(self):
         """Close the WebSocket connection if available"""
+        if self._sender_task:
+            # Give queued log_sync sends a chance to go out before the socket closes
+            try:
+                await asyncio.wait_for(self._send_queue.join(), timeout=5)
+            except asyncio.TimeoutError:
+                self.logger.debug("Timed out flushing queued log sends to watcher")
+            self._sender_task.cancel()
+            self._sender_task = None
+            self._send_queue = None
         if self.ws_manager:
             await self.ws_manager.close()
 
@@ -1,8 +1,10 @@
 import asyncio
-import csv
+import functools
 import os
 import re
 import shutil
+import tempfile
+from collections import deque
 from pathlib import Path
 from typing import Optional
 
@@ -15,11 +17,29 @@ except Exception:
 
 from models import SubmissionData, SubmissionType
 
+# Use the multi-connection hf_transfer backend when it is installed; must be set
+# before huggingface_hub is imported (it reads the flag at import time).
+# Only applies to this interpreter: an auto-set flag is not forwarded to the .v4env
+# subprocesses, which may not have hf_transfer (huggingface_hub raises if so).
+_HF_TRANSFER_AUTO = False
+if "HF_HUB_ENABLE_HF_TRANSFER" not in os.environ:
+    try:
+        import hf_transfer  # type: ignore  # noqa: F401
+        os.environ["HF_HUB_ENABLE_HF_TRANSFER"] = "1"
+        _HF_TRANSFER_AUTO = True
+    except Exception:
+        pass
+
 try:
     from huggingface_hub import snapshot_download
 except Exception:
     snapshot_download = None
 
+try:
+    from huggingface_hub.utils import HfHubHTTPError
+except Exception:
+    HfHubHTTPError = OSError  # its base class (via requests.HTTPError)
+
 
 def _P(val: str) -> Path:
     return Path(os.path.expanduser(os.path.expandvars(val))).resolve()
@@ -55,6 +75,69 @@ DEFAULT_NUM_GPUS = os.getenv("BFCL_NUM_GPUS", "1")
 DEFAULT_GPU_UTIL = os.getenv("BFCL_GPU_UTIL", "0.9")
 DEFAULT_VISIBLE_DEVICE = os.getenv("CUDA_VISIBLE_DEVICES", "0") 
 
+# bfcl argv templates (the executable itself is resolved lazily, see _bfcl_cmd)
+_GEN_ARGS = (
+    "generate",
+    "--model", DEFAULT_MODEL_ARG_NAME,
+    "--test-category", DEFAULT_TEST_CATEGORY,
+    "--backend", DEFAULT_BACKEND,
+    "--num-gpus", DEFAULT_NUM_GPUS,
+    "--gpu-memory-utilization", DEFAULT_GPU_UTIL,
+)
+_EVAL_ARGS = (
+    "evaluate",
+    "--model", DEFAULT_MODEL_ARG_NAME,
+    "--test-category", DEFAULT_TEST_CATEGORY,
+)
+
+# Parallel file fetches for HF snapshot downloads (blank/invalid -> default)
+try:
+    HF_DOWNLOAD_WORKERS = max(1, int(os.getenv("HF_DOWNLOAD_WORKERS", "")))
+except ValueError:
+    HF_DOWNLOAD_WORKERS = 8
+
+# HuggingFace model URL -> (org, model)
+_HF_URL_RE = re.compile(r"^https?://huggingface\.co/([^/\s]+)/([^/\s#?]+)")
+
+# Environment forwarded to bfcl subprocesses; everything else is dropped.
+# Extra names can be added via BFCL_ENV_PASSTHROUGH (comma-separated).
+_ENV_PASSTHROUGH = (
+    "HOME", "PATH", "LANG", "LC_ALL", "USER", "TMPDIR", "TERM", "XDG_CACHE_HOME",
+    "LD_LIBRARY_PATH", "PYTHONPATH",
+    "OMP_NUM_THREADS", "TOKENIZERS_PARALLELISM",
+    "HTTP_PROXY", "HTTPS_PROXY", "NO_PROXY", "http_proxy", "https_proxy", "no_proxy",
+    "SSL_CERT_FILE", "SSL_CERT_DIR", "REQUESTS_CA_BUNDLE", "CURL_CA_BUNDLE",
+)
+# Prefix families needed by HF downloads (HF_TOKEN...), CUDA/NCCL, torch/triton and sglang
+_ENV_PASSTHROUGH_PREFIXES = (
+    "HF_", "HUGGING_FACE_", "CUDA_", "NCCL_",
+    "TORCH_", "PYTORCH_", "TORCHINDUCTOR_", "TRITON_",
+    "SGLANG_", "SGL_", "BFCL_",
+)
+
+# Subprocess output: lines are coalesced into one debug record per batch/interval,
+# and a short stderr tail is kept for the failure message
+_OUTPUT_RECORD_LINES = 50
+_OUTPUT_RECORD_CHARS = 4000
+_OUTPUT_RECORD_SECS = 2.0
+_STDERR_TAIL_LINES = 40
+
+# Directories in a model snapshot that never hold the submission's handler.py
+_HANDLER_SCAN_SKIP_DIRS = frozenset({".git", "__pycache__", ".cache"})
+
+
+@functools.lru_cache(maxsize=1)
+def _bfcl_cmd() -> tuple[str, ...]:
+    """Prefer venv bfcl binary; else use python -m bfcl.
+
+    Resolved on first use rather than at import: main.py imports this module in the
+    API process and forks jobs from it, so an import-time check would be frozen at
+    service start.
+    """
+    if BFCL_BIN.exists():
+        return (str(BFCL_BIN),)
+    return (str(PYTHON_BIN), "-m", "bfcl")
+
 
 class BountyTask:
     def __init__(self, job_id: str, logger_func=None):
@@ -62,6 +145,8 @@ class BountyTask:
         self.logger_func = logger_func
         self._task = None
         self._cancelled = False
+        self._env: Optional[dict] = None
+        self._csv_cache: Optional[tuple[tuple[int, int], float]] = None  # ((mtime_ns, size), overall)
 
     async def log(self, level: str, message: str, **kwargs):
         if self.logger_func:
@@ -78,7 +163,7 @@ class BountyTask:
         """
         if not url:
             return None
-        m = re.match(r"^https?://huggingface\.co/([^/\s]+)/([^/\s#?]+)", url.strip())
+        m = _HF_URL_RE.match(url.strip())
         if not m:
             return None
         return f"{m.group(1)}/{m.group(2)}"
@@ -88,12 +173,50 @@ class BountyTask:
         top = base_dir / "handler.py"
         if top.exists():
             return top
-        matches = list(base_dir.rglob("handler.py"))
-        return matches[0] if matches else None
+        for root, dirs, files in os.walk(base_dir):
+            dirs[:] = [d for d in dirs if d not in _HANDLER_SCAN_SKIP_DIRS]
+            if "handler.py" in files:
+                return Path(root) / "handler.py"
+        return None
+
+    def _file_matches(self, path: Path, data: bytes) -> bool:
+        """Cheap size check first, then compare content against bytes already in memory."""
+        try:
+            if path.stat().st_size != len(data):
+                return False
+        except FileNotFoundError:
+            return False
+        return path.read_bytes() == data
+
+    def _replace_file(self, path: Path, data: bytes) -> None:
+        """Write to a temp file next to `path`, then atomically rename it into place."""
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            if path.exists():
+                shutil.copymode(path, tmp)
+            else:
+                os.chmod(tmp, 0o644)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
 
     def _venv_env(self) -> dict:
-        """Create env that *forces* the .v4env venv + CUDA device mapping."""
-        env = os.environ.copy()
+        """Create env that *forces* the .v4env venv + CUDA device mapping.
+
+        Built once per task and reused for every subprocess of the job.
+        """
+        if self._env is not None:
+            return self._env
+        extra = {k.strip() for k in os.getenv("BFCL_ENV_PASSTHROUGH", "").split(",") if k.strip()}
+        env = {
+            k: v for k, v in os.environ.items()
+            if k in _ENV_PASSTHROUGH or k in extra or k.startswith(_ENV_PASSTHROUGH_PREFIXES)
+        }
+        if _HF_TRANSFER_AUTO:
+            env.pop("HF_HUB_ENABLE_HF_TRANSFER", None)
         # Respect caller’s override if set; else default to configured GPU
         env.setdefault("CUDA_DEVICE_ORDER", os.getenv("CUDA_DEVICE_ORDER", "PCI_BUS_ID"))
         env.setdefault("CUDA_VISIBLE_DEVICES", DEFAULT_VISIBLE_DEVICE)
@@ -103,10 +226,58 @@ class BountyTask:
         env["PATH"] = f"{VENV_BIN}:{env.get('PATH','')}"
         # Typical Python venv isolation vars (optional but harmless)
         env.setdefault("PYTHONNOUSERSITE", "1")
+        self._env = env
         return env
 
+    async def _pump_stream(
+        self,
+        stream: asyncio.StreamReader,
+        label: str,
+        name: str,
+        tail: Optional[deque] = None,
+    ) -> None:
+        """Forward a subprocess pipe to the logger, coalescing lines into batched records."""
+        loop = asyncio.get_running_loop()
+        pending: list[str] = []
+        size = 0
+        deadline = 0.0
+
+        async def flush() -> None:
+            nonlocal size
+            if pending:
+                await self.log("debug", f"[{label}] " + "\n".join(pending), step=name)
+                pending.clear()
+                size = 0
+
+        while True:
+            # While lines are buffered, wake up at the deadline so quiet periods still flush
+            timeout = max(deadline - loop.time(), 0) if pending else None
+            try:
+                line_b = await asyncio.wait_for(stream.readline(), timeout)
+            except asyncio.TimeoutError:
+                await flush()
+                continue
+            except ValueError:
+                # Line exceeded the reader limit (e.g. progress-bar spam); asyncio already dropped it
+                continue
+            if not line_b:
+                await flush()
+                return
+            # rstrip only: leading whitespace carries traceback indentation
+            line = line_b.decode(errors="replace").rstrip()[:_OUTPUT_RECORD_CHARS]
+            if not line.strip():
+                continue
+            if tail is not None:
+                tail.append(line)
+            if pending and (len(pending) >= _OUTPUT_RECORD_LINES or size + len(line) > _OUTPUT_RECORD_CHARS):
+                await flush()
+            if not pending:
+                deadline = loop.time() + _OUTPUT_RECORD_SECS
+            pending.append(line)
+            size += len(line) + 1
+
     async def _run_cmd(self, cmd: list[str], cwd: Optional[Path] = None, name: str = "") -> None:
-        """Run a subprocess inside the venv; raise with captured logs on failure."""
+        """Run a subprocess inside the venv, streaming its output; raise with captured logs on failure."""
         env = self._venv_env()
         await self.log("info", f"Running: {' '.join(cmd)}", step=name or "run_cmd")
         proc = await asyncio.create_subprocess_exec(
@@ -116,37 +287,48 @@ class BountyTask:
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE,
         )
-        out_b, err_b = await proc.communicate()
-        out, err = out_b.decode(errors="replace"), err_b.decode(errors="replace")
-
-        if out.strip():
-            await self.log("debug", f"[stdout] {out.strip()[:4000]}", step=name)
-        if err.strip():
-            await self.log("debug", f"[stderr] {err.strip()[:4000]}", step=name)
+        err_tail: deque = deque(maxlen=_STDERR_TAIL_LINES)
+        await asyncio.gather(
+            self._pump_stream(proc.stdout, "stdout", name),
+            self._pump_stream(proc.stderr, "stderr", name, tail=err_tail),
+        )
+        await proc.wait()
 
         if proc.returncode != 0:
-            raise RuntimeError(f"{name or 'command'} failed (exit {proc.returncode}).")
-
-    def _bfcl_cmd(self) -> list[str]:
-        """Prefer venv bfcl binary; else use python -m bfcl."""
-        if BFCL_BIN.exists():
-            return [str(BFCL_BIN)]
-        return [str(PYTHON_BIN), "-m", "bfcl"]
+            msg = f"{name or 'command'} failed (exit {proc.returncode})."
+            if err_tail:
+                tail = "\n".join(err_tail)[-_OUTPUT_RECORD_CHARS:]
+                msg += f"\n[stderr] {tail}"
+            raise RuntimeError(msg)
 
     def _read_overall_from_csv(self, csv_path: Path) -> float:
-        if not csv_path.exists():
-            raise FileNotFoundError(f"Score CSV not found at {csv_path}")
-        import csv as _csv
-        with csv_path.open(newline="", encoding="utf-8") as f:
-            reader = _csv.DictReader(f)
-            for row in reader:
-                val = row.get("Overall Acc", "") or row.get("Overall Accuracy", "")
-                if not val:
-                    continue
-                val = val.strip()
-                if val.endswith("%"):
-                    val = val[:-1]
-                return round(float(val), 2)
+        try:
+            st = csv_path.stat()
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Score CSV not found at {csv_path}") from None
+        stamp = (st.st_mtime_ns, st.st_size)
+        if self._csv_cache and self._csv_cache[0] == stamp:
+            return self._csv_cache[1]
+        overall = self._parse_overall(csv_path)
+        self._csv_cache = (stamp, overall)
+        return overall
+
+    def _parse_overall(self, csv_path: Path) -> float:
+        # Fixed-schema file: locate the column once from the header, then scan rows
+        lines = csv_path.read_text(encoding="utf-8").splitlines()
+        header = [h.strip() for h in lines[0].split(",")] if lines else []
+        for col in ("Overall Acc", "Overall Accuracy"):
+            if col in header:
+                idx = header.index(col)
+                break
+        else:
+            raise ValueError("Could not find 'Overall Acc' in score CSV.")
+        for line in lines[1:]:
+            fields = line.split(",")
+            val = fields[idx].strip() if idx < len(fields) else ""
+            if not val:
+                continue
+            return round(float(val.rstrip("%")), 2)
         raise ValueError("Could not find 'Overall Acc' in score CSV.")
 
     # -------------------------- Public API --------------------------
@@ -193,12 +375,21 @@ class BountyTask:
         download_dir.parent.mkdir(parents=True, exist_ok=True)
 
         await self.log("info", f"Downloading model to {download_dir}")
-        local_path = snapshot_download(
-            repo_id=repo_id,
-            local_dir=str(download_dir),
-            local_dir_use_symlinks=False,
-            resume_download=True,
-        )
+        # Blocking network I/O: run in a worker thread so the loop keeps pumping logs
+        try:
+            local_path = await asyncio.to_thread(
+                snapshot_download,
+                repo_id=repo_id,
+                local_dir=str(download_dir),
+                local_dir_use_symlinks=False,
+                resume_download=True,
+                max_workers=HF_DOWNLOAD_WORKERS,
+            )
+        except HfHubHTTPError as e:
+            # Logged once by score()
+            raise RuntimeError(f"Failed to download {repo_id} from HuggingFace: {e}") from e
+        if self._cancelled:
+            raise asyncio.CancelledError("Task was cancelled during model download")
         model_dir = Path(local_path)
 
         # 3) Swap handler.py
@@ -207,13 +398,22 @@ class BountyTask:
             raise FileNotFoundError(f"Could not find handler.py in {model_dir}")
         await self.log("info", f"Using handler.py at {handler_src}", handler=str(handler_src))
 
+        # Read the handler once. bitagent.py must never go missing (a failed write or a
+        # /kill-job mid-swap would break BFCL), so back up via hard link and swap atomically.
+        handler_data = handler_src.read_bytes()
         backup_dst = BITAGENT_HANDLER_DST.with_suffix(".py.bak")
         if BITAGENT_HANDLER_DST.exists() and not backup_dst.exists():
-            shutil.copy2(BITAGENT_HANDLER_DST, backup_dst)
+            try:
+                os.link(BITAGENT_HANDLER_DST, backup_dst)
+            except OSError:
+                shutil.copy2(BITAGENT_HANDLER_DST, backup_dst)
             await self.log("info", f"Backed up original bitagent.py to {backup_dst}")
 
-        shutil.copy2(handler_src, BITAGENT_HANDLER_DST)
-        await self.log("info", f"Overwrote BFCL bitagent handler with {handler_src}", target=str(BITAGENT_HANDLER_DST))
+        if self._file_matches(BITAGENT_HANDLER_DST, handler_data):
+            await self.log("info", f"BFCL bitagent handler already matches {handler_src}; skipping copy", target=str(BITAGENT_HANDLER_DST))
+        else:
+            self._replace_file(BITAGENT_HANDLER_DST, handler_data)
+            await self.log("info", f"Overwrote BFCL bitagent handler with {handler_src}", target=str(BITAGENT_HANDLER_DST))
 
         # 4) Clear stale score CSV (avoid reading old results)
         try:
@@ -223,23 +423,11 @@ class BountyTask:
                 SCORE_CSV.unlink()
 
         # 5) Run bfcl generate inside venv
-        gen_cmd = self._bfcl_cmd() + [
-            "generate",
-            "--model", DEFAULT_MODEL_ARG_NAME,
-            "--test-category", DEFAULT_TEST_CATEGORY,
-            "--backend", DEFAULT_BACKEND,
-            "--num-gpus", DEFAULT_NUM_GPUS,
-            "--gpu-memory-utilization", DEFAULT_GPU_UTIL,
-            "--local-model-path", str(model_dir),
-        ]
+        gen_cmd = [*_bfcl_cmd(), *_GEN_ARGS, "--local-model-path", str(model_dir)]
         await self._run_cmd(gen_cmd, cwd=BFCL_ROOT, name="bfcl_generate")
 
         # 6) Run bfcl evaluate inside venv
-        eval_cmd = self._bfcl_cmd() + [
-            "evaluate",
-            "--model", DEFAULT_MODEL_ARG_NAME,
-            "--test-category", DEFAULT_TEST_CATEGORY,
-        ]
+        eval_cmd = [*_bfcl_cmd(), *_EVAL_ARGS]
         await self._run_cmd(eval_cmd, cwd=BFCL_ROOT, name="bfcl_evaluate")
 
         # 7) Parse score and return Overall Acc